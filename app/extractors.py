@@ -2,7 +2,7 @@
 Functions for extracting data from Zotero items.
 """
 
-from kerko.extractors import InCollectionExtractor
+from kerko.extractors import Extractor, InCollectionExtractor, ItemDataExtractor
 
 
 class InCollectionBoostExtractor(InCollectionExtractor):
@@ -16,3 +16,44 @@ class InCollectionBoostExtractor(InCollectionExtractor):
         if super().extract(item_context, library_context, spec):
             return self.boost_factor
         return None
+
+
+class AlternateIdExtractor(Extractor):
+    """
+    Extract alternate identifiers from the Extra field of an item.
+
+    The field is split into lines once, and each `key: value` line is
+    dispatched on its key.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.extra_extractor = ItemDataExtractor(key='extra')
+
+    def extract(self, item_context, library_context, spec):
+        extra = self.extra_extractor.extract(item_context, library_context, spec)
+        if not extra:
+            return None
+        # Most items have none of the identifiers; skip the line scan for them.
+        lowered = extra.lower()
+        if 'itemalsoknownas' not in lowered and 'shortdoi' not in lowered:
+            return None
+        aka = kerko = None
+        sdois = []
+        for line in extra.splitlines():
+            key, sep, value = line.partition(':')
+            if not sep:
+                continue
+            key = key.strip().lower()
+            if key == 'edtechhub.itemalsoknownas':
+                if aka is None:  # Keep the first match only.
+                    aka = value.split(';')
+            elif key == 'kerkocite.itemalsoknownas':
+                if kerko is None:  # Keep the first match only.
+                    kerko = value.strip().split(' ')
+            elif key == 'shortdoi':
+                value = value.strip()
+                if value and len(value.split()) == 1:
+                    sdois.append(value)
+        ids = [v.strip() for v in (aka or []) + (kerko or []) + sdois]
+        return [v for v in ids if v] or None
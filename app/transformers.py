@@ -5,12 +5,21 @@ Utilities for transforming data.
 import re
 from copy import deepcopy
 
+# Matches a whole unwanted line of the Extra field, including its line break.
+_EXTRA_FIELD_UNWANTED = re.compile(
+    r'^[^\S\n]*(?:EdTechHub|KerkoCite)\..*(?:\n|\Z)',
+    flags=re.IGNORECASE | re.MULTILINE,
+)
+
 
 def extra_field_cleaner(value):
     if 'extra' in value:
         value = deepcopy(value)  # Preserve original data, might be used by other extractors.
-        pattern = re.compile(r'^\s*(EdTechHub|KerkoCite)\..*', flags=re.IGNORECASE)
-        value['extra'] = '\n'.join(
-            filter(lambda line: not pattern.match(line), value['extra'].split('\n'))
-        ).strip()
+        value['extra'] = _EXTRA_FIELD_UNWANTED.sub('', value['extra']).strip()
+    return value
+
+
+def preview_span_rewrapper(value):
+    if value.startswith('<span>') and value.endswith('</span>'):
+        return f'<div class="csl-entry">{value[6:-7]}</div>'
     return value
@@ -1,12 +1,20 @@
-from environs import Env
+import gc
+import os
+
+from dotenv import load_dotenv
 from flask import redirect, url_for
 
 from app import create_app
 
-env = Env()  # pylint: disable=invalid-name
-env.read_env()
+load_dotenv()
+
+application = create_app(os.environ['FLASK_ENV'])  # pylint: disable=invalid-name
 
-application = create_app(env.str('FLASK_ENV'))  # pylint: disable=invalid-name
+# The app, including its Kerko composer, is now fully built. When the server
+# loads this module before forking its workers, moving these objects to the
+# garbage collector's permanent generation keeps collections in the workers
+# from writing to them, so their memory pages remain shared copy-on-write.
+gc.freeze()
 
 
 @application.route('/')